@@ -1,14 +1,18 @@
 import pandas as pd
-import random
-import datetime
 import os
+import shutil
+import uuid
+from urllib.parse import quote, unquote
 
-def load_and_process_data(source):
+from enrichment import get_default_pipeline
+
+def load_and_process_data(source, pipeline=None):
     """
     CSVファイルを読み込み、データ処理と拡張を行う関数。
     
     Args:
         source (str or file-like): CSVファイルのパス または ファイルオブジェクト
+        pipeline (EnrichmentPipeline, optional): 付与処理のパイプライン（省略時は標準パイプライン）
         
     Returns:
         pd.DataFrame: 処理済みのDataFrame
@@ -32,72 +36,256 @@ def load_and_process_data(source):
         # 「注文日時」をdatetime型に変換
         df['注文日時'] = pd.to_datetime(df['注文日時'])
         
-        # シミュレーション用データの生成（フォールバック用）
-        weather_conditions = ['晴れ', '雨', '曇り']
+        # 天気・イベント・祝日・トレンドスコアをユニークなキーごとに計算して付与
+        if pipeline is None:
+            pipeline = get_default_pipeline()
+        df = pipeline.run(df)
 
-        # 店舗情報の取得（最初の行から取得）
-        store_name = "東京" # デフォルト
-        if '店舗名' in df.columns and not df['店舗名'].isnull().all():
-            store_name = df['店舗名'].iloc[0]
-        
-        # 座標の取得
-        from external_services import get_location, get_weather_data
-        lat, lon = None, None
-        try:
-            coords = get_location(store_name)
-            if coords:
-                lat, lon = coords
-                print(f"Coordinates found for {store_name}: {lat}, {lon}")
-            else:
-                print(f"Coordinates not found for {store_name}, using fallback.")
-        except Exception as e:
-            print(f"Error getting coordinates: {e}")
+        # 期間フィルタを二分探索で行えるよう「注文日時」順に並べ替える（同時刻は元の順序を保持）
+        df = df.sort_values('注文日時', kind='mergesort', ignore_index=True)
 
-        # 日付ごとの天気データを取得（APIコール数削減のため）
-        unique_dates = df['注文日時'].dt.date.unique()
-        weather_cache = {}
+        return df
 
-        for d in unique_dates:
-            # datetimeオブジェクトに変換（時間は正午とする）
-            dt = datetime.datetime.combine(d, datetime.time(12, 0))
-            
-            # get_weather_dataはエラー時にダミーデータを返すので、そのまま使用
-            if lat is not None and lon is not None:
-                weather_info = get_weather_data(lat, lon, dt)
-            else:
-                # 座標がない場合もダミーデータを使用（get_weather_dataのダミーと同じ形式で）
-                weather_info = {"weather": "晴れ", "temp": 25}
-            
-            weather_cache[d] = weather_info
+    except Exception as e:
+        raise RuntimeError(f"データ処理中にエラーが発生しました: {str(e)}")
 
-        # 行ごとにデータを付与
-        def augment_row(row):
-            date = row['注文日時']
-            d = date.date()
-            
-            # 天気・気温 (キャッシュから取得)
-            w_info = weather_cache.get(d, {"weather": "晴れ", "temp": 25})
-            weather = w_info['weather']
-            temp = w_info['temp']
+def parse_date(value):
+    """
+    期間フィルタの日付（文字列・date・datetime）をTimestampに変換する。
+
+    Returns:
+        pd.Timestamp or None: 値が空の場合はNone
+
+    Raises:
+        ValueError: 日付として解釈できない場合
+    """
+    if value is None or value == '':
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"日付を解釈できません: {value}") from e
+    if pd.isna(ts):
+        raise ValueError(f"日付を解釈できません: {value}")
+    return ts
+
+class SalesDataset:
+    """
+    「注文日時」でソート済みのDataFrameと、日付・店舗のインデックスを保持するクラス。
+    期間・店舗によるフィルタを全行のブールマスクではなく、
+    二分探索と店舗ごとの行位置の参照で行う。
+    """
 
-            # イベントフラグの付与 (9/14, 9/21)
-            is_event_day = (date.day == 14 or date.day == 21)
-            event_flag = 1 if is_event_day else 0
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): load_and_process_dataで処理されたDataFrame
+        """
+        if not df['注文日時'].is_monotonic_increasing:
+            df = df.sort_values('注文日時', kind='mergesort', ignore_index=True)
+        self.df = df
+        self._times = df['注文日時']
 
-            # トレンドスコアの付与 (0-100)
-            trend_score = random.randint(30, 90)
-            if is_event_day:
-                trend_score += 10 # イベント日はトレンドも高いとする
+        # 店舗名 -> 行位置（昇順）のインデックス
+        if '店舗名' in df.columns:
+            self._store_index = df.groupby('店舗名', sort=False).indices
+        else:
+            self._store_index = {}
 
-            return pd.Series([weather, temp, event_flag, trend_score])
+    @property
+    def stores(self):
+        return list(self._store_index.keys())
 
-        # 新しいカラムを追加
-        df[['天気', '気温', 'イベントあり', 'トレンドスコア']] = df.apply(augment_row, axis=1)
+    def _day_start(self, value):
+        """
+        日付をその日の0時のTimestampにし、「注文日時」のタイムゾーンに合わせる。
+        """
+        ts = parse_date(value)
+        tz = self._times.dt.tz
+        if tz is not None:
+            ts = ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+        elif ts.tzinfo is not None:
+            ts = ts.tz_localize(None)
+        return ts.normalize()
 
-        return df
+    def _time_bounds(self, start_date=None, end_date=None):
+        """
+        期間（終了日を含む）に対応する行位置の範囲 [lo, hi) を二分探索で求める。
+        """
+        lo, hi = 0, len(self.df)
+        if start_date is not None:
+            start = self._day_start(start_date)
+            lo = int(self._times.searchsorted(start, side='left'))
+        if end_date is not None:
+            end = self._day_start(end_date) + pd.Timedelta(days=1)
+            hi = int(self._times.searchsorted(end, side='left'))
+        return lo, max(lo, hi)
+
+    def filter(self, start_date=None, end_date=None, store=None):
+        """
+        期間と店舗で絞り込んだDataFrameを返す。
+
+        Args:
+            start_date (str or date, optional): 開始日（この日を含む）
+            end_date (str or date, optional): 終了日（この日を含む）
+            store (str, optional): 店舗名
+
+        Returns:
+            pd.DataFrame: 該当行のコピー（0始まりのRangeIndex。呼び出し側の変更でインデックスが壊れないようにする）
+        """
+        if start_date == '':
+            start_date = None
+        if end_date == '':
+            end_date = None
+        if start_date is None and end_date is None and store is None:
+            return self.df.copy()
+
+        lo, hi = self._time_bounds(start_date, end_date)
+
+        if store is None:
+            return self.df.iloc[lo:hi].reset_index(drop=True)
+
+        positions = self._store_index.get(store)
+        if positions is None:
+            return self.df.iloc[0:0].reset_index(drop=True)
+
+        # 店舗の行位置は昇順なので、期間の範囲も二分探索で切り出せる
+        left = positions.searchsorted(lo, side='left')
+        right = positions.searchsorted(hi, side='left')
+        return self.df.take(positions[left:right]).reset_index(drop=True)
+
+
+_PARTITION_FILE = 'data.parquet'
+_CURRENT_FILE = 'CURRENT'
+_VERSION_PREFIX = 'v-'
+_NO_STORE = '__none__'
+# 「注文日時」が欠損している行の月パーティション
+_NO_MONTH = '__none__'
+
+
+def _store_partition(store):
+    return 'store=' + quote(str(store), safe='')
+
+
+def _current_version_dir(root):
+    current_path = os.path.join(root, _CURRENT_FILE)
+    if not os.path.exists(current_path):
+        return None
+    with open(current_path, encoding='utf-8') as f:
+        version = f.read().strip()
+    version_dir = os.path.join(root, version)
+    return version_dir if os.path.isdir(version_dir) else None
+
+
+def save_dataset(df, root):
+    """
+    処理済みDataFrameを「月 × 店舗」でパーティション分割して保存する。
+    レイアウト: {root}/v-{バージョン}/month=YYYY-MM/store={店舗名}/data.parquet
+
+    新しいバージョンのディレクトリに書き込んだ後、CURRENTファイルを置き換えて
+    切り替えるため、以前のアップロードのパーティションと混ざることはない。
+    読み込み中の処理が失敗しないよう、直前のバージョンは次回の保存まで残す。
+
+    Args:
+        df (pd.DataFrame): load_and_process_dataで処理されたDataFrame
+        root (str): 保存先ディレクトリ
+    """
+    version = _VERSION_PREFIX + uuid.uuid4().hex
+    version_dir = os.path.join(root, version)
+
+    months = df['注文日時'].dt.strftime('%Y-%m').fillna(_NO_MONTH)
+    if '店舗名' in df.columns:
+        stores = df['店舗名'].fillna(_NO_STORE)
+    else:
+        stores = pd.Series(_NO_STORE, index=df.index)
+
+    previous_dir = _current_version_dir(root)
+    previous = os.path.basename(previous_dir) if previous_dir else None
+
+    os.makedirs(version_dir)
+    for (month, store), part in df.groupby([months, stores], sort=False, dropna=False):
+        part_dir = os.path.join(version_dir, f'month={month}', _store_partition(store))
+        os.makedirs(part_dir, exist_ok=True)
+        part.to_parquet(os.path.join(part_dir, _PARTITION_FILE), index=False)
+
+    # os.replaceはアトミックなので、読み込み側は常に旧版か新版のどちらか一方を参照する
+    tmp_path = os.path.join(root, f'{_CURRENT_FILE}.{version}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, _CURRENT_FILE))
+
+    # 直前のバージョンより古いものを削除
+    for name in os.listdir(root):
+        if name.startswith(_VERSION_PREFIX) and name not in (version, previous):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def load_dataset(root, start_date=None, end_date=None, store=None):
+    """
+    save_datasetで保存したデータから、期間・店舗に該当するパーティションのみを読み込む。
+
+    Args:
+        root (str): 保存先ディレクトリ
+        start_date (str or date, optional): 開始日（この日を含む）
+        end_date (str or date, optional): 終了日（この日を含む）
+        store (str, optional): 店舗名
+
+    Returns:
+        SalesDataset or None: 保存データがない場合はNone
+    """
+    if not os.path.isdir(root):
+        return None
+
+    start = parse_date(start_date)
+    end = parse_date(end_date)
+    start_month = start.strftime('%Y-%m') if start is not None else None
+    end_month = end.strftime('%Y-%m') if end is not None else None
+
+    try:
+        frames = _read_partitions(root, start_month, end_month, store)
+    except FileNotFoundError:
+        # 読み込み中に別のプロセスが保存して旧版が削除された場合は、CURRENTを読み直して一度だけ再試行する
+        frames = _read_partitions(root, start_month, end_month, store)
+
+    if not frames:
+        return None
+
+    dataset = SalesDataset(pd.concat(frames, ignore_index=True))
+    # 月単位のパーティション内を日単位・店舗で絞り込む
+    return SalesDataset(dataset.filter(start_date, end_date, store))
+
+
+def _read_partitions(root, start_month, end_month, store):
+    version_dir = _current_version_dir(root)
+    if version_dir is None:
+        return []
+
+    frames = []
+    for month_dir in sorted(os.listdir(version_dir)):
+        if not month_dir.startswith('month='):
+            continue
+        month = month_dir[len('month='):]
+        if month == _NO_MONTH:
+            # 日時が欠損している行は期間の指定がない場合のみ対象
+            if start_month is not None or end_month is not None:
+                continue
+        # YYYY-MM形式なので文字列比較で月の範囲を判定できる
+        elif start_month is not None and month < start_month:
+            continue
+        elif end_month is not None and month > end_month:
+            continue
+
+        month_path = os.path.join(version_dir, month_dir)
+        for store_dir in sorted(os.listdir(month_path)):
+            if not store_dir.startswith('store='):
+                continue
+            if store is not None and unquote(store_dir[len('store='):]) != str(store):
+                continue
+            path = os.path.join(month_path, store_dir, _PARTITION_FILE)
+            if os.path.exists(path):
+                frames.append(pd.read_parquet(path))
+    return frames
 
-    except Exception as e:
-        raise RuntimeError(f"データ処理中にエラーが発生しました: {str(e)}")
 
 def analyze_sales(df):
     """
@@ -0,0 +1,40 @@
+"""
+holidays.csv（HolidayEnricherが参照する日本の祝日カレンダー）を再生成するスクリプト。
+
+祝日は保守されている `holidays` パッケージ（pip install holidays）から取得する。
+カレンダーの最終日を過ぎたデータは全て祝日なし（0）として扱われるため、
+年に一度程度、対象期間を延ばして実行し、生成されたファイルをコミットすること。
+
+Usage:
+    python backend/calendars/update_holidays.py --start-year 2020 --end-year 2030
+"""
+import argparse
+import csv
+import datetime
+import os
+
+import holidays
+
+
+def main():
+    this_year = datetime.date.today().year
+    parser = argparse.ArgumentParser(description="日本の祝日カレンダー（holidays.csv）を再生成する")
+    parser.add_argument("--start-year", type=int, default=this_year - 5)
+    parser.add_argument("--end-year", type=int, default=this_year + 5)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), 'holidays.csv'))
+    args = parser.parse_args()
+
+    years = range(args.start_year, args.end_year + 1)
+    jp_holidays = holidays.country_holidays('JP', years=years, language='ja')
+
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['日付', '名称'])
+        for date, name in sorted(jp_holidays.items()):
+            writer.writerow([date.isoformat(), name])
+
+    print(f"Wrote {len(jp_holidays)} holidays ({args.start_year}-{args.end_year}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
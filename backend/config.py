@@ -13,6 +13,15 @@ class Config:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
     GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+    # 処理済みデータを月×店舗のパーティションで保存するディレクトリ（未設定なら保存しない）
+    DATASET_DIR = os.getenv("DATASET_DIR")
+    # エンリッチメント用のローカルカレンダーと乱数シード
+    CALENDAR_DIR = os.path.join(os.path.dirname(__file__), 'calendars')
+    EVENTS_CALENDAR_PATH = os.getenv("EVENTS_CALENDAR_PATH", os.path.join(CALENDAR_DIR, 'events.csv'))
+    HOLIDAYS_CALENDAR_PATH = os.getenv("HOLIDAYS_CALENDAR_PATH", os.path.join(CALENDAR_DIR, 'holidays.csv'))
+    ENRICHMENT_SEED = int(os.getenv("ENRICHMENT_SEED", "42"))
+    # エンリッチャーごとのキャッシュの最大件数（キーの数）
+    ENRICHMENT_CACHE_SIZE = int(os.getenv("ENRICHMENT_CACHE_SIZE", "10000"))
 
     @classmethod
     def is_weather_api_configured(cls):
@@ -21,3 +30,7 @@ class Config:
     @classmethod
     def is_maps_api_configured(cls):
         return bool(cls.GOOGLE_MAPS_API_KEY)
+
+    @classmethod
+    def is_dataset_dir_configured(cls):
+        return bool(cls.DATASET_DIR)
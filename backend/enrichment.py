@@ -0,0 +1,324 @@
+import datetime
+import os
+import random
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+# 「店舗名」カラムがない場合の店舗名
+DEFAULT_STORE_NAME = "東京"
+
+
+def _resolve_date(df):
+    dates = df['注文日時'].dt.normalize()
+    # カレンダーと照合できるよう、タイムゾーン付きの場合は現地日付（naive）にする
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates
+
+
+def _resolve_store(df):
+    if '店舗名' in df.columns:
+        return df['店舗名'].fillna(DEFAULT_STORE_NAME)
+    return pd.Series(DEFAULT_STORE_NAME, index=df.index)
+
+
+# 全てのエンリッチャーが参照できる仮想キー（DataFrameのカラム以外）
+KEY_RESOLVERS = {
+    'date': _resolve_date,
+    'store': _resolve_store,
+}
+
+
+class LRUCache:
+    """
+    最大件数を超えると最も古く参照されたキーから削除するキャッシュ。
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+class Uncached(tuple):
+    """
+    キャッシュしない計算結果（外部APIが失敗した際のフォールバック値など）。
+    computeがこの型を返した場合、次回のlookupで再計算される。
+    """
+
+
+class Enricher:
+    """
+    DataFrameにカラムを付与するエンリッチャーの基底クラス。
+
+    input_keysで宣言したキー（仮想キー 'date' / 'store' または既存カラム名）の
+    ユニークな組み合わせごとに一度だけcomputeを呼び出し、結果を行へブロードキャストする。
+    計算結果はキーごとにLRUキャッシュされるため、同じインスタンスを再利用すれば
+    アップロードをまたいでも再計算（外部APIコール）は発生しない。
+    ただし欠損値を含むキーとUncachedの結果はキャッシュしない。
+    """
+    input_keys = ()
+    output_columns = ()
+
+    def __init__(self, cache_size=None):
+        self._cache = LRUCache(Config.ENRICHMENT_CACHE_SIZE if cache_size is None else cache_size)
+
+    def compute(self, key):
+        """
+        1つのキーに対する出力値を計算する。
+
+        Args:
+            key (tuple): input_keysの順に並んだキーの値
+
+        Returns:
+            tuple: output_columnsの順に並んだ値
+        """
+        raise NotImplementedError
+
+    def lookup(self, key):
+        values = self._cache.get(key)
+        if values is not None:
+            return values
+
+        values = self.compute(key)
+        if not isinstance(values, Uncached) and not any(pd.isna(k) for k in key):
+            self._cache.set(key, tuple(values))
+        return tuple(values)
+
+    def start_run(self):
+        """
+        パイプラインの実行ごとに呼ばれる。実行中だけ保持する状態の初期化に使う。
+        """
+
+    def clear_cache(self):
+        self._cache.clear()
+
+
+class WeatherEnricher(Enricher):
+    """
+    店舗×日付ごとに天気・気温を付与する（外部APIの失敗時はダミーデータ）。
+    ダミーデータはキャッシュしないため、次のアップロードで再取得される。
+    """
+    input_keys = ('store', 'date')
+    output_columns = ('天気', '気温')
+
+    DUMMY_DATA = {"weather": "晴れ", "temp": 25}
+
+    def __init__(self, cache_size=None):
+        super().__init__(cache_size)
+        self._locations = LRUCache(self._cache.maxsize)
+        # 座標が取得できなかった店舗（同じ実行中に何度も問い合わせないためのもの）
+        self._failed_locations = set()
+
+    def start_run(self):
+        self._failed_locations.clear()
+
+    def _get_coords(self, store_name):
+        from external_services import get_location
+
+        coords = self._locations.get(store_name)
+        if coords is not None or store_name in self._failed_locations:
+            return coords
+
+        try:
+            coords = get_location(store_name)
+            if coords:
+                print(f"Coordinates found for {store_name}: {coords[0]}, {coords[1]}")
+            else:
+                print(f"Coordinates not found for {store_name}, using fallback.")
+        except Exception as e:
+            coords = None
+            print(f"Error getting coordinates: {e}")
+
+        if coords:
+            self._locations.set(store_name, coords)
+        else:
+            self._failed_locations.add(store_name)
+        return coords
+
+    def compute(self, key):
+        from external_services import get_weather_data
+
+        store_name, date = key
+        coords = self._get_coords(store_name)
+        if coords is None or pd.isna(date):
+            return Uncached((self.DUMMY_DATA['weather'], self.DUMMY_DATA['temp']))
+
+        # 時間は正午とする
+        dt = datetime.datetime.combine(date.date(), datetime.time(12, 0))
+        weather_info = get_weather_data(coords[0], coords[1], dt)
+        values = (weather_info['weather'], weather_info['temp'])
+        if weather_info.get('fallback'):
+            return Uncached(values)
+        return values
+
+
+class CalendarEnricher(Enricher):
+    """
+    ローカルのカレンダーファイル（CSV: 日付, 名称）に載っている日かどうかのフラグを付与する。
+    ファイルが存在しない場合は全ての日を0とする。
+    warn_after_last_dateがTrueの場合、カレンダーの最終日より後の日付があれば実行ごとに一度警告する。
+    """
+    input_keys = ('date',)
+
+    def __init__(self, path, column, cache_size=None, warn_after_last_date=False):
+        super().__init__(cache_size)
+        self.path = path
+        self.output_columns = (column,)
+        self.warn_after_last_date = warn_after_last_date
+        self._dates = None
+        self._last_date = None
+        self._warned = False
+
+    def start_run(self):
+        self._warned = False
+
+    def _load_dates(self):
+        if self._dates is None:
+            if self.path and os.path.exists(self.path):
+                calendar = pd.read_csv(self.path)
+                dates = pd.to_datetime(calendar['日付']).dt.normalize()
+                self._dates = set(dates)
+                self._last_date = dates.max() if len(dates) else None
+            else:
+                print(f"Calendar file not found: {self.path}")
+                self._dates = set()
+        return self._dates
+
+    def compute(self, key):
+        (date,) = key
+        dates = self._load_dates()
+        if (self.warn_after_last_date and not self._warned
+                and self._last_date is not None and date > self._last_date):
+            print(f"Warning: {date.date()} is after the last date in {self.path} ({self._last_date.date()}).")
+            self._warned = True
+        return (1 if date in dates else 0,)
+
+
+class EventCalendarEnricher(CalendarEnricher):
+    def __init__(self, path=None, cache_size=None):
+        super().__init__(path or Config.EVENTS_CALENDAR_PATH, 'イベントあり', cache_size)
+
+
+class HolidayEnricher(CalendarEnricher):
+    """
+    祝日フラグを付与する。holidays.csvはcalendars/update_holidays.pyで再生成する。
+    """
+    def __init__(self, path=None, cache_size=None):
+        super().__init__(path or Config.HOLIDAYS_CALENDAR_PATH, '祝日', cache_size, warn_after_last_date=True)
+
+
+class TrendScoreEnricher(Enricher):
+    """
+    日付ごとのトレンドスコア（30-90、イベント日は+10）を付与する。
+    シードと日付から乱数を生成するため、同じシードなら実行ごとに同じ値になる。
+    """
+    input_keys = ('date', 'イベントあり')
+    output_columns = ('トレンドスコア',)
+
+    def __init__(self, seed=None, cache_size=None):
+        super().__init__(cache_size)
+        self.seed = Config.ENRICHMENT_SEED if seed is None else seed
+
+    def compute(self, key):
+        date, event_flag = key
+        rng = random.Random(f"{self.seed}:{date}")
+        trend_score = rng.randint(30, 90)
+        if event_flag:
+            trend_score += 10 # イベント日はトレンドも高いとする
+        return (trend_score,)
+
+
+class EnrichmentPipeline:
+    """
+    エンリッチャーを順番に適用するパイプライン。
+    後段のエンリッチャーは前段が付与したカラムを入力キーとして使用できる。
+    """
+
+    def __init__(self, enrichers):
+        self.enrichers = list(enrichers)
+
+    @staticmethod
+    def _resolve_keys(df, input_keys):
+        keys = {}
+        for k in input_keys:
+            if k in df.columns:
+                keys[k] = df[k]
+            elif k in KEY_RESOLVERS:
+                keys[k] = KEY_RESOLVERS[k](df)
+            else:
+                raise ValueError(f"エンリッチャーの入力キー「{k}」を解決できません。")
+        return pd.DataFrame(keys, index=df.index)
+
+    def apply(self, df, enricher):
+        keys = self._resolve_keys(df, enricher.input_keys)
+
+        # ユニークなキーごとに一度だけ計算し、グループ番号で各行へブロードキャストする
+        # （各グループの先頭行をグループ番号順に取り出すので、欠損値を含むキーでも番号と揃う）
+        codes = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+        _, first_rows = np.unique(codes, return_index=True)
+        unique_keys = keys.iloc[first_rows]
+        values = pd.DataFrame(
+            [enricher.lookup(tuple(k)) for k in unique_keys.itertuples(index=False, name=None)],
+            columns=list(enricher.output_columns),
+        )
+
+        for col in enricher.output_columns:
+            df[col] = values[col].to_numpy()[codes]
+        return df
+
+    def run(self, df):
+        """
+        Args:
+            df (pd.DataFrame): 「注文日時」がdatetime型に変換済みのDataFrame
+
+        Returns:
+            pd.DataFrame: 各エンリッチャーのカラムを付与したDataFrame
+        """
+        for enricher in self.enrichers:
+            enricher.start_run()
+            df = self.apply(df, enricher)
+        return df
+
+
+_default_pipeline = None
+
+
+def get_default_pipeline():
+    """
+    天気・イベント・祝日・トレンドスコアの標準パイプラインを返す。
+    キャッシュを再利用するため、プロセス内で同じインスタンスを共有する。
+    """
+    global _default_pipeline
+    if _default_pipeline is None:
+        _default_pipeline = EnrichmentPipeline([
+            WeatherEnricher(),
+            EventCalendarEnricher(),
+            HolidayEnricher(),
+            TrendScoreEnricher(),
+        ])
+    return _default_pipeline
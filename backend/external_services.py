@@ -38,8 +38,8 @@ def get_weather_data(lat, lon, date_obj):
     APIキーが未設定、エラー、またはデータがない場合は
     安全策としてダミーデータ（晴れ/25度）を返す。
     """
-    # ダミーデータ（フォールバック用）
-    DUMMY_DATA = {"weather": "晴れ", "temp": 25}
+    # ダミーデータ（フォールバック用、呼び出し元がキャッシュしないよう fallback を付ける）
+    DUMMY_DATA = {"weather": "晴れ", "temp": 25, "fallback": True}
 
     if not Config.is_weather_api_configured():
         print("OpenWeatherMap API Key not configured. Using dummy data.")
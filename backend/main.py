@@ -20,15 +20,24 @@ from fastapi.middleware.cors import CORSMiddleware
 import io
 import random
 
-from analysis_engine import load_and_process_data, analyze_sales as engine_analyze_sales
+from analysis_engine import (
+    load_and_process_data,
+    analyze_sales as engine_analyze_sales,
+    SalesDataset,
+    parse_date,
+    save_dataset,
+    load_dataset,
+)
+from config import Config
 
 from pydantic import BaseModel
 from ai_agent import SalesAnalyst
 
 app = FastAPI()
 
-# Global variable to store the latest dataframe (MVP solution)
-latest_df = None
+# Global variable to store the latest dataset (MVP solution)
+# SalesDataset keeps the frame sorted by 注文日時 with a store index for filter pushdown
+latest_dataset = None
 
 # CORS configuration
 origins = [
@@ -47,41 +56,81 @@ app.add_middleware(
 class QueryRequest(BaseModel):
     text: str | None = None
     query: str | None = None
+    start_date: str | None = None
+    end_date: str | None = None
+    store: str | None = None
+
+def get_filtered_df(start_date: str | None = None, end_date: str | None = None, store: str | None = None):
+    """
+    Return the rows of the latest dataset matching the date range (inclusive) and store.
+    Falls back to reading only the matching persisted partitions when nothing is in memory.
+    """
+    try:
+        if latest_dataset is not None:
+            return latest_dataset.filter(start_date, end_date, store)
+        if Config.is_dataset_dir_configured():
+            dataset = load_dataset(Config.DATASET_DIR, start_date, end_date, store)
+            if dataset is not None:
+                return dataset.df
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {str(e)}")
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read saved dataset: {str(e)}")
+
+    raise HTTPException(status_code=400, detail="No data available. Please upload a CSV file first.")
 
 @app.post("/api/analyze")
-async def analyze_sales(file: UploadFile = File(...)):
-    global latest_df
+async def analyze_sales(
+    file: UploadFile = File(...),
+    start_date: str | None = None,
+    end_date: str | None = None,
+    store: str | None = None,
+):
+    global latest_dataset
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Invalid file format. Please upload a CSV file.")
 
+    # Validate the filter before doing any processing
+    try:
+        parse_date(start_date)
+        parse_date(end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {str(e)}")
+
     try:
         content = await file.read()
         # Use analysis_engine to process data
         df = load_and_process_data(io.BytesIO(content))
         
         # Store for AI agent
-        latest_df = df
+        latest_dataset = SalesDataset(df)
+        if Config.is_dataset_dir_configured():
+            save_dataset(latest_dataset.df, Config.DATASET_DIR)
         
-        # Analyze data
-        analysis_result = engine_analyze_sales(df)
+        # Analyze data (only the requested date range / store)
+        try:
+            filtered_df = latest_dataset.filter(start_date, end_date, store)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {str(e)}")
+        analysis_result = engine_analyze_sales(filtered_df)
         
         # Return the analysis result directly
         return {"data": analysis_result}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 @app.post("/api/analyze_query")
 async def analyze_query(request: QueryRequest):
-    global latest_df
-    if latest_df is None:
-        raise HTTPException(status_code=400, detail="No data available. Please upload a CSV file first.")
+    df = get_filtered_df(request.start_date, request.end_date, request.store)
     
     try:
         # Use the new LLMAnalyst from analysis_engine
         from analysis_engine import LLMAnalyst
         analyst = LLMAnalyst()
-        result = analyst.analyze_query(latest_df, request.text)
+        result = analyst.analyze_query(df, request.text)
         
         # Map result to frontend expected format if needed, or just return as is
         # The frontend expects: { type, data, x_key, y_key, summary } from the OLD endpoint
@@ -93,7 +142,7 @@ async def analyze_query(request: QueryRequest):
         # But the user specifically asked for /api/chat_analyze.
         
         from ai_agent import SalesAnalyst
-        analyst_old = SalesAnalyst(latest_df)
+        analyst_old = SalesAnalyst(df)
         return analyst_old.analyze(request.text)
 
     except Exception as e:
@@ -101,9 +150,7 @@ async def analyze_query(request: QueryRequest):
 
 @app.post("/api/chat_analyze")
 async def chat_analyze(request: QueryRequest):
-    global latest_df
-    if latest_df is None:
-        raise HTTPException(status_code=400, detail="No data available. Please upload a CSV file first.")
+    df = get_filtered_df(request.start_date, request.end_date, request.store)
     
     try:
         from analysis_engine import LLMAnalyst
@@ -112,7 +159,7 @@ async def chat_analyze(request: QueryRequest):
         if not user_query:
             raise HTTPException(status_code=400, detail="Query text is required.")
             
-        result = analyst.analyze_query(latest_df, user_query)
+        result = analyst.analyze_query(df, user_query)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI Analysis failed: {str(e)}")
@@ -0,0 +1,133 @@
+import pandas as pd
+import pytest
+
+from analysis_engine import SalesDataset, load_dataset, parse_date, save_dataset
+
+
+def make_df(times, stores=None):
+    df = pd.DataFrame({'注文日時': pd.to_datetime(times), '数量': range(len(times))})
+    if stores is not None:
+        df['店舗名'] = stores
+    return df
+
+
+@pytest.fixture
+def sales_df():
+    return make_df(
+        ['2025-09-14 10:00', '2025-08-31 23:00', '2025-09-01 09:00', '2025-09-14 23:59', '2025-09-15 00:00'],
+        ['渋谷', '新宿', '渋谷', '新宿', '渋谷'],
+    )
+
+
+def test_sorts_by_order_time(sales_df):
+    dataset = SalesDataset(sales_df)
+    assert dataset.df['注文日時'].is_monotonic_increasing
+
+
+def test_filter_end_date_is_inclusive(sales_df):
+    result = SalesDataset(sales_df).filter('2025-09-01', '2025-09-14')
+    assert list(result['注文日時'].dt.strftime('%m-%d %H:%M')) == ['09-01 09:00', '09-14 10:00', '09-14 23:59']
+
+
+def test_filter_by_store_and_date(sales_df):
+    result = SalesDataset(sales_df).filter(start_date='2025-09-01', store='渋谷')
+    assert list(result['注文日時'].dt.strftime('%m-%d')) == ['09-01', '09-14', '09-15']
+    assert set(result['店舗名']) == {'渋谷'}
+
+
+def test_filter_unknown_store_is_empty(sales_df):
+    result = SalesDataset(sales_df).filter(store='池袋')
+    assert result.empty
+    assert list(result.columns) == list(sales_df.columns)
+
+
+def test_filter_store_without_store_column():
+    df = make_df(['2025-09-01', '2025-09-02'])
+    assert SalesDataset(df).filter(store='渋谷').empty
+    assert len(SalesDataset(df).filter(start_date='2025-09-02')) == 1
+
+
+def test_filter_without_predicate_returns_copy(sales_df):
+    dataset = SalesDataset(sales_df)
+    result = dataset.filter()
+    result['売上'] = 0
+    result.drop(result.index[:2], inplace=True)
+    assert '売上' not in dataset.df.columns
+    assert len(dataset.df) == len(sales_df)
+
+
+def test_filter_timezone_aware_column():
+    df = make_df(['2025-09-14T10:00:00+09:00', '2025-09-15T01:00:00+09:00'])
+    result = SalesDataset(df).filter('2025-09-15', '2025-09-15')
+    assert len(result) == 1
+
+
+def test_parse_date_rejects_invalid():
+    assert parse_date(None) is None
+    assert parse_date('') is None
+    with pytest.raises(ValueError):
+        parse_date('not-a-date')
+
+
+def test_load_dataset_reads_only_matching_partitions(tmp_path, sales_df):
+    save_dataset(SalesDataset(sales_df).df, str(tmp_path))
+
+    dataset = load_dataset(str(tmp_path), '2025-09-14', '2025-09-14', '新宿')
+    assert list(dataset.df['注文日時'].dt.strftime('%m-%d %H:%M')) == ['09-14 23:59']
+
+    august = load_dataset(str(tmp_path), end_date='2025-08-31')
+    assert list(august.df['店舗名']) == ['新宿']
+
+    assert load_dataset(str(tmp_path), start_date='2025-10-01') is None
+
+
+def test_save_dataset_replaces_previous_upload(tmp_path, sales_df):
+    save_dataset(SalesDataset(sales_df).df, str(tmp_path))
+    save_dataset(make_df(['2025-10-01'], ['渋谷']), str(tmp_path))
+
+    dataset = load_dataset(str(tmp_path))
+    assert len(dataset.df) == 1
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+
+
+def test_load_dataset_missing_root(tmp_path):
+    assert load_dataset(str(tmp_path / 'missing')) is None
+
+
+def test_filter_returns_range_index(sales_df):
+    dataset = SalesDataset(sales_df)
+    assert list(dataset.filter('2025-09-14').index) == [0, 1, 2]
+    assert list(dataset.filter(store='渋谷').index) == [0, 1, 2]
+
+
+def test_save_and_load_keeps_rows_without_order_time(tmp_path):
+    df = make_df(['2025-09-01', None, '2025-09-02'], ['渋谷', '渋谷', '新宿'])
+    dataset = SalesDataset(df)
+    save_dataset(dataset.df, str(tmp_path))
+
+    loaded = load_dataset(str(tmp_path))
+    assert len(loaded.df) == len(dataset.filter()) == 3
+    assert loaded.df['注文日時'].isna().sum() == 1
+    assert len(load_dataset(str(tmp_path), start_date='2025-09-01').df) == 2
+
+
+def test_save_dataset_keeps_previous_version_for_readers(tmp_path, sales_df):
+    for _ in range(3):
+        save_dataset(SalesDataset(sales_df).df, str(tmp_path))
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+
+
+def test_load_dataset_retries_when_version_is_removed(tmp_path, sales_df, monkeypatch):
+    save_dataset(SalesDataset(sales_df).df, str(tmp_path))
+    read_parquet = pd.read_parquet
+    failures = []
+
+    def flaky_read_parquet(path, *args, **kwargs):
+        if not failures:
+            failures.append(path)
+            raise FileNotFoundError(path)
+        return read_parquet(path, *args, **kwargs)
+
+    monkeypatch.setattr(pd, 'read_parquet', flaky_read_parquet)
+    assert len(load_dataset(str(tmp_path)).df) == len(sales_df)
+    assert len(failures) == 1
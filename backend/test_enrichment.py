@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+from enrichment import (
+    CalendarEnricher,
+    EnrichmentPipeline,
+    Enricher,
+    TrendScoreEnricher,
+    Uncached,
+    WeatherEnricher,
+)
+
+
+class CountingEnricher(Enricher):
+    input_keys = ('カテゴリ', 'date')
+    output_columns = ('ラベル',)
+
+    def __init__(self, cache_size=None):
+        super().__init__(cache_size)
+        self.calls = []
+
+    def compute(self, key):
+        self.calls.append(key)
+        category, date = key
+        return (f"{category}:{date.date()}",)
+
+
+def make_df():
+    return pd.DataFrame({
+        '注文日時': pd.to_datetime([
+            '2025-09-01 10:00', '2025-09-01 12:00', '2025-09-02 10:00',
+            '2025-09-01 18:00', '2025-09-02 11:00', '2025-09-03 09:00',
+        ]),
+        'カテゴリ': ['A', np.nan, 'A', 'B', np.nan, 'A'],
+    })
+
+
+def test_computes_once_per_unique_key():
+    df = pd.DataFrame({
+        '注文日時': pd.to_datetime([
+            '2025-09-01 10:00', '2025-09-01 12:00', '2025-09-01 13:00',
+            '2025-09-02 10:00', '2025-09-01 18:00', '2025-09-02 11:00',
+            '2025-09-02 15:00', '2025-09-01 19:00',
+        ]),
+        'カテゴリ': ['A', 'A', np.nan, 'A', np.nan, np.nan, 'A', 'A'],
+    })
+    enricher = CountingEnricher()
+    df = EnrichmentPipeline([enricher]).run(df)
+
+    # (A, 09-01), (nan, 09-01), (A, 09-02), (nan, 09-02)
+    assert len(enricher.calls) == 4
+    assert df['ラベル'][0] == df['ラベル'][1] == df['ラベル'][7] == 'A:2025-09-01'
+    assert df['ラベル'][2] == df['ラベル'][4] == 'nan:2025-09-01'
+    assert df['ラベル'][3] == df['ラベル'][6] == 'A:2025-09-02'
+    assert df['ラベル'][5] == 'nan:2025-09-02'
+
+
+def test_nan_keys_broadcast_to_matching_rows():
+    df = make_df()
+    # 欠損値のキーが先頭に来るケース
+    df.loc[0, 'カテゴリ'] = np.nan
+    df = EnrichmentPipeline([CountingEnricher()]).run(df)
+
+    expected = [f"{c}:{d.date()}" for c, d in zip(df['カテゴリ'], df['注文日時'])]
+    assert list(df['ラベル']) == expected
+
+
+def test_cache_reused_across_runs_except_nan_keys():
+    enricher = CountingEnricher()
+    pipeline = EnrichmentPipeline([enricher])
+    pipeline.run(make_df())
+    enricher.calls.clear()
+
+    pipeline.run(make_df())
+    assert all(pd.isna(category) for category, _ in enricher.calls)
+
+
+def test_cache_is_bounded():
+    enricher = CountingEnricher(cache_size=2)
+    EnrichmentPipeline([enricher]).run(make_df())
+    assert len(enricher._cache) == 2
+
+
+def test_uncached_results_are_recomputed():
+    class FlakyEnricher(Enricher):
+        input_keys = ('date',)
+        output_columns = ('値',)
+        calls = 0
+
+        def compute(self, key):
+            FlakyEnricher.calls += 1
+            return Uncached((0,))
+
+    enricher = FlakyEnricher()
+    pipeline = EnrichmentPipeline([enricher])
+    pipeline.run(make_df())
+    pipeline.run(make_df())
+    assert FlakyEnricher.calls == 6
+
+
+def test_trend_score_is_deterministic():
+    def run():
+        df = make_df()
+        df['イベントあり'] = [0, 0, 1, 0, 1, 0]
+        return EnrichmentPipeline([TrendScoreEnricher(seed=7)]).run(df)['トレンドスコア']
+
+    first, second = run(), run()
+    assert list(first) == list(second)
+    # 同じ日付は同じスコア、イベント日は+10
+    assert first[0] == first[1] == first[3]
+    assert first[2] == first[4]
+    assert all(30 <= score <= 100 for score in first)
+
+
+def test_weather_fallback_is_not_cached(monkeypatch):
+    import external_services
+
+    responses = [{"weather": "晴れ", "temp": 25, "fallback": True}, {"weather": "雨", "temp": 18.5}]
+    monkeypatch.setattr(external_services, 'get_location', lambda store: (35.0, 139.0))
+    monkeypatch.setattr(external_services, 'get_weather_data', lambda lat, lon, dt: responses.pop(0))
+
+    enricher = WeatherEnricher()
+    df = pd.DataFrame({'注文日時': pd.to_datetime(['2025-09-01 10:00'])})
+    pipeline = EnrichmentPipeline([enricher])
+
+    assert pipeline.run(df.copy())['天気'][0] == '晴れ'
+    assert pipeline.run(df.copy())['天気'][0] == '雨'
+    assert pipeline.run(df.copy())['天気'][0] == '雨'
+
+
+def test_failed_geocode_is_retried_next_run(monkeypatch):
+    import external_services
+
+    calls = []
+
+    def get_location(store):
+        calls.append(store)
+        return None if len(calls) == 1 else (35.0, 139.0)
+
+    monkeypatch.setattr(external_services, 'get_location', get_location)
+    monkeypatch.setattr(external_services, 'get_weather_data', lambda lat, lon, dt: {"weather": "曇り", "temp": 20})
+
+    df = pd.DataFrame({'注文日時': pd.to_datetime(['2025-09-01', '2025-09-02'])})
+    pipeline = EnrichmentPipeline([WeatherEnricher()])
+
+    assert list(pipeline.run(df.copy())['天気']) == ['晴れ', '晴れ']
+    assert len(calls) == 1
+    assert list(pipeline.run(df.copy())['天気']) == ['曇り', '曇り']
+
+
+def test_calendar_matches_timezone_aware_dates(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text('日付,名称\n2025-09-14,祭り\n', encoding='utf-8')
+
+    df = pd.DataFrame({'注文日時': pd.to_datetime(['2025-09-14T23:00:00+09:00', '2025-09-15T10:00:00+09:00'])})
+    df = EnrichmentPipeline([CalendarEnricher(str(path), 'イベントあり')]).run(df)
+    assert list(df['イベントあり']) == [1, 0]
+
+
+def test_only_holiday_calendar_warns_past_last_date(tmp_path, capsys):
+    from enrichment import EventCalendarEnricher, HolidayEnricher
+
+    path = tmp_path / 'calendar.csv'
+    path.write_text('日付,名称\n2025-09-14,祭り\n', encoding='utf-8')
+    df = pd.DataFrame({'注文日時': pd.to_datetime(['2025-10-01'])})
+
+    EnrichmentPipeline([EventCalendarEnricher(str(path))]).run(df.copy())
+    assert 'Warning' not in capsys.readouterr().out
+
+    pipeline = EnrichmentPipeline([HolidayEnricher(str(path))])
+    pipeline.run(df.copy())
+    assert 'Warning' in capsys.readouterr().out
+
+    # 次の実行でも新しい日付が最終日を過ぎていれば再度警告する
+    pipeline.run(pd.DataFrame({'注文日時': pd.to_datetime(['2025-11-01'])}))
+    assert 'Warning' in capsys.readouterr().out
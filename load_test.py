@@ -0,0 +1,404 @@
+"""
+Load test for the FastAPI backend.
+
+Starts backend/main.py's app under uvicorn in a child process with Gemini,
+OpenWeather and Google Maps replaced by local stubs, drives concurrent CSV
+uploads and chat queries over HTTP from this process, and reports latency
+percentiles, throughput, peak in-flight requests, the server's event-loop
+lag and the server's RSS over time.
+
+The load generator and the RSS sampler never run on the server's event loop,
+so a blocking handler shows up as server loop lag and latency rather than
+stalling the measurements.
+
+Usage:
+    pip install -r requirements-loadtest.txt
+    python load_test.py --concurrency 20 --duration 30 --llm-delay 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import pandas as pd
+import psutil
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+# Canned analysis code that satisfies both /api/analyze_query (result_data, summary)
+# and /api/chat_analyze (result_df, summary_text)
+CANNED_CODE = """
+result_df = df.groupby(df['注文日時'].dt.strftime('%Y-%m-%d')).size().reset_index(name='count')
+result_df.columns = ['date', 'count']
+result_data = result_df.to_dict(orient='records')
+chart_type = 'bar'
+x_key = 'date'
+y_key = 'count'
+summary_text = '日別の注文件数です。'
+summary = summary_text
+"""
+
+LOOP_LAG_INTERVAL = 0.01
+
+
+# ---------------------------------------------------------------------------
+# Server side (runs in the child process)
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel that returns CANNED_CODE after a delay.
+    The delay is a blocking sleep, like the real synchronous client.
+    """
+    delay = 0.0
+
+    def __init__(self, model_name, *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, *args, **kwargs):
+        time.sleep(self.delay)
+        return FakeResponse(CANNED_CODE)
+
+
+def install_stubs(llm_delay, external_delay):
+    """
+    Replace every outbound API with local stubs so no real request is made.
+    """
+    import google.generativeai as genai
+    import external_services
+    from config import Config
+
+    FakeGenerativeModel.delay = llm_delay
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+
+    def get_location(store_name):
+        time.sleep(external_delay)
+        return 35.68, 139.76
+
+    def get_weather_data(lat, lon, date_obj):
+        time.sleep(external_delay)
+        return {"weather": random.Random(date_obj.toordinal()).choice(['晴れ', '雨', '曇り']), "temp": 25}
+
+    external_services.get_location = get_location
+    external_services.get_weather_data = get_weather_data
+
+    os.environ["GOOGLE_API_KEY"] = "stub"
+    Config.GOOGLE_API_KEY = "stub"
+    Config.DATASET_DIR = None
+
+
+async def measure_loop_lag(lags):
+    """
+    Record (wall time, lag) for how late the event loop wakes up from a short sleep.
+    Large values mean a handler is blocking the loop.
+    """
+    while True:
+        expected = time.perf_counter() + LOOP_LAG_INTERVAL
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lags.append((time.time(), max(0.0, time.perf_counter() - expected)))
+
+
+def serve(args):
+    import uvicorn
+
+    sys.path.append(BACKEND_DIR)
+    install_stubs(args.llm_delay, args.external_delay)
+    from main import app
+
+    lags = []
+
+    @app.get("/__loadtest/loop_lag")
+    def loop_lag(since: float = 0.0):
+        return {"samples": [lag for t, lag in lags if t >= since]}
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+
+    async def main():
+        monitor = asyncio.create_task(measure_loop_lag(lags))
+        try:
+            await server.serve()
+        finally:
+            monitor.cancel()
+
+    asyncio.run(main())
+
+
+# ---------------------------------------------------------------------------
+# Client side (runs in this process)
+# ---------------------------------------------------------------------------
+
+def make_csv(rows, stores, days, seed):
+    """
+    Generate a synthetic sales CSV with the columns load_and_process_data expects.
+    """
+    rng = random.Random(seed)
+    start = pd.Timestamp("2025-09-01")
+    offsets = sorted(rng.randrange(days * 24 * 3600) for _ in range(rows))
+    df = pd.DataFrame({
+        '注文日時': [start + pd.Timedelta(seconds=s) for s in offsets],
+        '店舗名': [f"店舗{rng.randrange(stores)}" for _ in range(rows)],
+        '注文番号': [i // 3 for i in range(rows)],
+        '単価（税込）': [rng.choice([300, 500, 800, 1200]) for _ in range(rows)],
+        '数量': [rng.randint(1, 4) for _ in range(rows)],
+    })
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))
+    return values[index]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, port):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--serve",
+        "--port", str(port),
+        "--llm-delay", str(args.llm_delay),
+        "--external-delay", str(args.external_delay),
+    ]
+    # The backend prints generated code for every query, so hide it unless asked
+    process = subprocess.Popen(command, stdout=None if args.server_output else subprocess.DEVNULL)
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup (code {process.returncode})")
+        try:
+            if httpx.get(base_url + "/", timeout=1.0).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("Server did not start in time")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+class RSSSampler(threading.Thread):
+    """
+    Samples the server process RSS from a separate thread.
+    """
+
+    def __init__(self, pid, interval):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.started = time.perf_counter()
+
+    def run(self):
+        while True:
+            try:
+                rss = self.process.memory_info().rss
+            except psutil.Error:
+                return
+            self.samples.append((time.perf_counter() - self.started, rss))
+            if self.stop_event.wait(self.interval):
+                return
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def record(self, name, elapsed, ok):
+        self.latencies.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+async def upload(client, csv_bytes):
+    files = {'file': ('load_test.csv', csv_bytes, 'text/csv')}
+    return await client.post("/api/analyze", files=files)
+
+
+async def chat(client, queries):
+    return await client.post("/api/chat_analyze", json={"query": random.choice(queries)})
+
+
+async def worker(client, stats, deadline, csv_bytes, upload_ratio, queries):
+    while time.perf_counter() < deadline:
+        if random.random() < upload_ratio:
+            name, call = "upload", upload(client, csv_bytes)
+        else:
+            name, call = "chat", chat(client, queries)
+
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        started = time.perf_counter()
+        try:
+            response = await call
+            ok = response.status_code == 200
+        except Exception as e:
+            print(f"{name} request failed: {e}")
+            ok = False
+        finally:
+            stats.in_flight -= 1
+        stats.record(name, time.perf_counter() - started, ok)
+
+
+async def drive(args, base_url, server_pid):
+    csv_bytes = make_csv(args.rows, args.stores, args.days, args.seed)
+    queries = ["日別の売上を教えて", "雨の日の売上傾向を教えて", "店舗ごとの客数は？"]
+    random.seed(args.seed)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        # Chat queries need data, so upload once before starting the clock
+        response = await upload(client, csv_bytes)
+        response.raise_for_status()
+
+        stats = Stats()
+        sampler = RSSSampler(server_pid, args.rss_interval)
+        wall_started = time.time()
+        sampler.start()
+        started = time.perf_counter()
+        deadline = started + args.duration
+
+        await asyncio.gather(*(
+            worker(client, stats, deadline, csv_bytes, args.upload_ratio, queries)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+
+        response = await client.get("/__loadtest/loop_lag", params={"since": wall_started})
+        lags = response.json()["samples"]
+
+    return build_report(args, stats, sampler.samples, lags, elapsed)
+
+
+def build_report(args, stats, rss_samples, lags, elapsed):
+    endpoints = {}
+    for name, values in stats.latencies.items():
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": stats.errors.get(name, 0),
+            "throughput_rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+
+    total = sum(len(v) for v in stats.latencies.values())
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "server_output")},
+        "elapsed_s": elapsed,
+        "total_requests": total,
+        "throughput_rps": total / elapsed,
+        "peak_in_flight": stats.peak_in_flight,
+        "endpoints": endpoints,
+        "server_loop_lag_ms": {
+            "samples": len(lags),
+            "p50": percentile(lags, 50) * 1000,
+            "p99": percentile(lags, 99) * 1000,
+            "max": max(lags, default=float('nan')) * 1000,
+        },
+        "server_rss_mb": [
+            {"t_s": round(t, 2), "rss_mb": round(rss / 1024 / 1024, 1)}
+            for t, rss in rss_samples
+        ],
+    }
+
+
+def print_report(report):
+    print(f"\nDuration: {report['elapsed_s']:.1f}s  "
+          f"Requests: {report['total_requests']}  "
+          f"Throughput: {report['throughput_rps']:.1f} req/s  "
+          f"Peak in-flight: {report['peak_in_flight']}/{report['config']['concurrency']}")
+
+    print(f"\n{'endpoint':<10}{'reqs':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in report["endpoints"].items():
+        print(f"{name:<10}{s['requests']:>8}{s['errors']:>8}{s['throughput_rps']:>10.1f}"
+              f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+
+    lag = report["server_loop_lag_ms"]
+    print(f"\nServer event loop lag ({lag['samples']} samples): "
+          f"p50 {lag['p50']:.1f} ms, p99 {lag['p99']:.1f} ms, max {lag['max']:.1f} ms")
+
+    rss = report["server_rss_mb"]
+    if rss:
+        peak = max(s["rss_mb"] for s in rss)
+        print(f"Server RSS: start {rss[0]['rss_mb']} MB, end {rss[-1]['rss_mb']} MB, peak {peak} MB")
+        print("Server RSS over time:")
+        for s in rss:
+            print(f"  {s['t_s']:>7.2f}s  {s['rss_mb']:>8.1f} MB")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test for the Restaurant BI backend.")
+    parser.add_argument("--concurrency", type=int, default=10, help="number of concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="test duration in seconds")
+    parser.add_argument("--upload-ratio", type=float, default=0.2, help="fraction of requests that are CSV uploads")
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="fake Gemini response delay in seconds")
+    parser.add_argument("--external-delay", type=float, default=0.05, help="fake weather/geocoding delay in seconds")
+    parser.add_argument("--rows", type=int, default=5000, help="rows in the generated CSV")
+    parser.add_argument("--stores", type=int, default=3, help="stores in the generated CSV")
+    parser.add_argument("--days", type=int, default=30, help="days covered by the generated CSV")
+    parser.add_argument("--rss-interval", type=float, default=1.0, help="RSS sampling interval in seconds")
+    parser.add_argument("--startup-timeout", type=float, default=30.0, help="seconds to wait for the server")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("--server-output", action="store_true", help="show the server's stdout")
+    # Internal: run the stubbed server (used by the child process)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        sys.exit(0)
+
+    process, base_url = start_server(args, free_port())
+    try:
+        report = asyncio.run(drive(args, base_url, process.pid))
+    finally:
+        stop_server(process)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {args.json}")